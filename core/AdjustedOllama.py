@@ -1,6 +1,8 @@
+import httpx
 from langchain_core.outputs import LLMResult
 from langchain_ollama import OllamaLLM
 
+from core.ResilientExecutor import ResilientExecutor, DEFAULT_RETRY_ON
 from utils.CustomLogger import log
 
 ASK_INTRO = """You are an AI assistant whose answers must rely exclusively on the context supplied. Follow these rules strictly:
@@ -36,14 +38,21 @@ PROMPT_VALIDATION_EXPECTED_KEYWORDS = """You are an AI language model developed
 1. If the expected keywords do not contain sufficient information to validate the answer or the answer is not correct, respond with 'Incorrect'. 
 2. If the answer is correct, respond with 'Correct'."""
 
+OLLAMA_RETRY_ON = (*DEFAULT_RETRY_ON, httpx.TransportError)
+
 ASK_TEMPLATE = "{intro} \n\nContext: {context} \n\nQuestion: {question} \n\nYour answer: "
 VALIDATION_TEMPLATE = "{intro} \n\n{validation_context} \n\nAnswer: {answer} \n\nYour validation (Correct/Incorrect): "
 
 
 class AdjustedOllama:
-    def __init__(self, model):
-        self.llm = OllamaLLM(model=model, temperature=0.1)
-        self.validation_llm = OllamaLLM(model=model, temperature=0.0)
+    def __init__(self, model, keep_alive=None, executor=None):
+        self.executor = executor if executor is not None else ResilientExecutor("ollama", retry_on=OLLAMA_RETRY_ON)
+        client_kwargs = {"timeout": self.executor.timeout_s}
+        self.llm = OllamaLLM(model=model, temperature=0.1, keep_alive=keep_alive, client_kwargs=client_kwargs)
+        self.validation_llm = OllamaLLM(model=model, temperature=0.0, keep_alive=keep_alive,
+                                        client_kwargs=client_kwargs)
+        self.warm_up_llm = OllamaLLM(model=model, temperature=0.1, keep_alive=keep_alive, num_predict=1,
+                                     client_kwargs=client_kwargs)
 
     def ask_ollama(self, context: str, prompt: str):
         contents = ASK_TEMPLATE.format(
@@ -53,21 +62,37 @@ class AdjustedOllama:
         )
         response_text, result = self.send_prompt_to_ollama(contents, validation=False)
 
-        details = None
-        info = result.generations[0][0].generation_info
-        if info:
-            details = {
-                'model': info.get('model'),
-                'prompt_eval_count': info.get('prompt_eval_count'),
-                'eval_count': info.get('eval_count'),
-                'total_duration_s': f"{(info.get('total_duration') / 1_000_000_000):.2f}" if info.get(
-                    'total_duration') else "N/A"
-            }
+        details = self.extract_details(result)
+        if details:
             log.statistics(
                 f"Model: {details['model']}, Prompt Tokens: {details['prompt_eval_count']}, Response Tokens: {details['eval_count']}, Duration: {details['total_duration_s']}s")
 
         return response_text, details
 
+    def warm_up(self, prompt: str = ""):
+        log.loading(f"Warming up model")
+        _, result = self._generate(self.warm_up_llm, prompt)
+        details = self.extract_details(result)
+        if details:
+            log.statistics(f"Model: {details['model']}, Load time: {details['load_duration_s']}s")
+        return details
+
+    @staticmethod
+    def extract_details(result: LLMResult):
+        info = result.generations[0][0].generation_info
+        if not info:
+            return None
+
+        return {
+            'model': info.get('model'),
+            'prompt_eval_count': info.get('prompt_eval_count'),
+            'eval_count': info.get('eval_count'),
+            'total_duration_s': f"{(info.get('total_duration') / 1_000_000_000):.2f}" if info.get(
+                'total_duration') else "N/A",
+            'load_duration_s': f"{(info.get('load_duration') / 1_000_000_000):.2f}" if info.get(
+                'load_duration') else "N/A"
+        }
+
     def validate_answer_with_context(self, answer: str, context: str):
         contents = VALIDATION_TEMPLATE.format(
             intro=PROMPT_VALIDATION_CONTEXT,
@@ -100,16 +125,17 @@ class AdjustedOllama:
 
     def send_prompt_to_ollama(self, prompt: str, validation: bool = False):
         log.full_prompt(prompt)
-        if validation:
-            result: LLMResult = self.validation_llm.generate([prompt])
-        else:
-            result: LLMResult = self.llm.generate([prompt])
-        response_text = result.generations[0][0].text.strip()
+        response_text, result = self._generate(self.validation_llm if validation else self.llm, prompt)
 
         log.full_response(response_text)
 
         return response_text, result
 
+    def _generate(self, llm: OllamaLLM, prompt: str):
+        result: LLMResult = self.executor.call(llm.generate, [prompt])
+        response_text = result.generations[0][0].text.strip()
+        return response_text, result
+
     @staticmethod
     def _interpret_validation_response(response: str) -> bool:
         response_lower = response.lower().strip()
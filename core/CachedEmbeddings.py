@@ -0,0 +1,27 @@
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embedding_model):
+        self.embedding_model = embedding_model
+        self.model = getattr(embedding_model, "model", type(embedding_model).__name__)
+        self.document_cache = {}
+        self.query_cache = {}
+        self.computed_count = 0
+        self.reused_count = 0
+
+    def embed_documents(self, texts):
+        missing = [text for text in dict.fromkeys(texts) if text not in self.document_cache]
+        if missing:
+            vectors = self.embedding_model.embed_documents(missing)
+            self.document_cache.update(zip(missing, vectors))
+
+        self.computed_count = self.computed_count + len(missing)
+        self.reused_count = self.reused_count + len(texts) - len(missing)
+
+        return [self.document_cache[text] for text in texts]
+
+    def embed_query(self, text):
+        if text not in self.query_cache:
+            self.query_cache[text] = self.embedding_model.embed_query(text)
+        return self.query_cache[text]
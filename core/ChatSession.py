@@ -0,0 +1,111 @@
+import os
+
+from ollama import Client
+
+from core.AdjustedOllama import AdjustedOllama, ASK_INTRO
+from utils.CustomLogger import log
+
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_HISTORY_TOKEN_BUDGET = 1500
+CHARS_PER_TOKEN = 4
+
+EMBEDDING_WARM_UP_TEXT = "warm up"
+
+SESSION_INTRO = ASK_INTRO + """
+
+6. Previous questions and answers of this conversation are listed under History.
+Use them only to understand what follow-up questions refer to, never as a knowledge source."""
+
+# The intro and history come first so that consecutive prompts share the longest possible prefix,
+# which lets Ollama reuse the already evaluated part of the prompt instead of processing it again.
+SESSION_PREFIX_TEMPLATE = "{intro} \n\nHistory:"
+HISTORY_TURN_TEMPLATE = "\nQuestion: {question}\nAnswer: {answer}"
+SESSION_TEMPLATE = "{prefix}{history} \n\nContext: {context} \n\nQuestion: {question} \n\nYour answer: "
+
+
+class ChatSession:
+    def __init__(self, model, embedding_model, embedding_base_url, keep_alive=DEFAULT_KEEP_ALIVE,
+                 history_token_budget=DEFAULT_HISTORY_TOKEN_BUDGET, executor=None):
+        self.adjusted_model = AdjustedOllama(model, keep_alive=keep_alive, executor=executor)
+        # Queries are embedded through the Ollama client directly, so the embedding model gets the same
+        # keep_alive as the LLM and its load time can be reported for every turn
+        self.embedding_model = embedding_model
+        self.embedding_client = Client(host=embedding_base_url, timeout=self.adjusted_model.executor.timeout_s)
+        self.keep_alive = keep_alive
+        self.last_embedding_load_duration_s = "N/A"
+        self.history_token_budget = history_token_budget
+        self.prefix = SESSION_PREFIX_TEMPLATE.format(intro=SESSION_INTRO)
+        self.history = []
+        self.last_question = None
+        self.previous_prompt = ""
+
+    def warm_up(self):
+        details = self.adjusted_model.warm_up(self.prefix)
+        self.previous_prompt = self.prefix
+
+        log.loading(f"Warming up embedding model")
+        self.embed_query(EMBEDDING_WARM_UP_TEXT)
+        log.statistics(f"Model: {self.embedding_model}, Load time: {self.last_embedding_load_duration_s}s")
+        return details
+
+    def embed_query(self, text: str):
+        response = self.adjusted_model.executor.call(
+            self.embedding_client.embed,
+            model=self.embedding_model,
+            input=text,
+            keep_alive=self.keep_alive
+        )
+        load_duration = response.get("load_duration")
+        self.last_embedding_load_duration_s = f"{(load_duration / 1_000_000_000):.2f}" if load_duration else "N/A"
+        return response["embeddings"][0]
+
+    def ask(self, context: str, question: str):
+        contents = SESSION_TEMPLATE.format(
+            prefix=self.prefix,
+            history="".join(self.history),
+            context=context,
+            question=question
+        )
+        prefix_reuse_chars = len(os.path.commonprefix([self.previous_prompt, contents]))
+        response_text, result = self.adjusted_model.send_prompt_to_ollama(contents, validation=False)
+        self.previous_prompt = contents
+
+        details = self.adjusted_model.extract_details(result) or {}
+        details['prefix_reuse_chars'] = prefix_reuse_chars
+        details['prefix_reuse_tokens_estimate'] = prefix_reuse_chars // CHARS_PER_TOKEN
+        details['history_turns'] = len(self.history)
+        details['embedding_load_duration_s'] = self.last_embedding_load_duration_s
+        log.statistics(
+            f"Model: {details.get('model')}, Prompt Tokens: {details.get('prompt_eval_count')}, "
+            f"Reused Prefix: ~{details['prefix_reuse_tokens_estimate']} tokens ({prefix_reuse_chars} chars), "
+            f"Load Time: {details.get('load_duration_s')}s, "
+            f"Embedding Load Time: {details['embedding_load_duration_s']}s, History Turns: {details['history_turns']}, "
+            f"Duration: {details.get('total_duration_s')}s")
+
+        self._add_to_history(question, response_text)
+
+        return response_text, details
+
+    def get_retrieval_query(self, question: str):
+        # Follow-up questions like "and when does it expire?" retrieve nothing useful on their own
+        if self.last_question is None:
+            return question
+        return f"{self.last_question}\n{question}"
+
+    def clear_history(self):
+        self.history = []
+        self.last_question = None
+
+    def _add_to_history(self, question, answer):
+        self.history.append(HISTORY_TURN_TEMPLATE.format(question=question, answer=answer))
+        self.last_question = question
+
+        # Dropping old turns changes the prompt prefix and invalidates the server cache,
+        # so trim down to half of the budget at once to keep such misses rare.
+        if self._history_tokens() > self.history_token_budget:
+            while self.history and self._history_tokens() > self.history_token_budget // 2:
+                self.history.pop(0)
+            log.info(f"Conversation history trimmed to {len(self.history)} turns")
+
+    def _history_tokens(self):
+        return sum(len(turn) for turn in self.history) // CHARS_PER_TOKEN
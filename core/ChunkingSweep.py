@@ -0,0 +1,158 @@
+import os
+import time
+
+from colorama import Fore
+from langchain_ollama import OllamaEmbeddings
+
+from core.CachedEmbeddings import CachedEmbeddings
+from core.CustomRag import CustomRag, DEFAULT_MODEL, DEFAULT_EMBEDDING_MODEL, DEFAULT_BASE_URL, DEFAULT_MILVUS_URI, \
+    DEFAULT_OLLAMA_TIMEOUT_S
+from core.TestRunner import TestRunner
+from utils.CustomLogger import log
+from utils.utils import save_json, get_current_datetime
+
+SWEEP_COLLECTION_PREFIX = "chunking_sweep"
+
+
+class ChunkingSweep:
+    def __init__(self,
+                 configurations,
+                 model=DEFAULT_MODEL,
+                 embedding_model=OllamaEmbeddings(model=DEFAULT_EMBEDDING_MODEL, base_url=DEFAULT_BASE_URL,
+                                                  client_kwargs={"timeout": DEFAULT_OLLAMA_TIMEOUT_S}),
+                 connection_uri=DEFAULT_MILVUS_URI):
+        self.configurations = configurations
+        self.model = model
+        self.embedding_model = CachedEmbeddings(embedding_model)
+        # Kept apart so the sentence embeddings of the semantic chunker do not count as chunk vectors
+        self.chunker_embedding_model = CachedEmbeddings(embedding_model)
+        self.connection_uri = connection_uri
+        self.sweep_results = []
+
+    def run(self, sources, question_sets, base_filename="chunking_sweep"):
+        os.makedirs("tests/results", exist_ok=True)
+        extracted_files = self._extract_sources(sources)
+        sweep_id = get_current_datetime()
+        results_path = f"tests/results/{base_filename}_{sweep_id}.json"
+
+        self.sweep_results = []
+        for index, configuration in enumerate(self.configurations, start=1):
+            name = configuration.get("name", f"configuration_{index}")
+            log.always(f"Running chunking configuration {index} of {len(self.configurations)}: {name}")
+            try:
+                result = self._run_configuration(name, configuration, extracted_files, question_sets,
+                                                 f"{SWEEP_COLLECTION_PREFIX}_{sweep_id}_{index}")
+            except Exception as error:
+                log.error(f"Chunking configuration {name} failed: {error}")
+                result = {"name": name, "configuration": configuration, "error": str(error)}
+
+            self.sweep_results.append(result)
+            save_json(self.sweep_results, results_path)
+
+        self._show_report()
+
+        return self.sweep_results
+
+    def _extract_sources(self, sources):
+        extracted_files = []
+        for source in sources:
+            log.loading(f"Extracting {source['file_type']} documents from {source['path']}")
+            extracted_files.extend(CustomRag.extract_files(source["path"], source["file_type"]))
+        log.info(f"Extracted {len(extracted_files)} files once for all configurations")
+        return extracted_files
+
+    def _run_configuration(self, name, configuration, extracted_files, question_sets, collection_name):
+        use_semantic = configuration.get("use_semantic", False)
+        rag_parameters = {
+            key: value for key, value in configuration.items() if key not in {"name", "use_semantic"}
+        }
+
+        rag = CustomRag(
+            embedding_model=self.embedding_model,
+            chunker_embedding_model=self.chunker_embedding_model,
+            collection_name=collection_name,
+            connection_uri=self.connection_uri,
+            **rag_parameters
+        )
+
+        try:
+            computed_before = self.embedding_model.computed_count
+            reused_before = self.embedding_model.reused_count
+            chunker_computed_before = self.chunker_embedding_model.computed_count
+            chunker_reused_before = self.chunker_embedding_model.reused_count
+            start_time = time.time()
+            chunk_count = rag.add_extracted_files(extracted_files, use_semantic)
+            ingestion_time = time.time() - start_time
+
+            test_runner = TestRunner(rag, self.model)
+            question_set_statistics = {}
+            for question_set_name, questions in question_sets.items():
+                test_runner.start_run()
+                for details in questions:
+                    test_runner.run_test(details)
+                question_set_statistics[question_set_name] = test_runner.generate_summary(
+                    save_summary=False, show_summary=False)
+        finally:
+            self._drop_collection(rag)
+
+        total_tests = sum(stat["total_tests"] for stat in question_set_statistics.values())
+        answered_tests = sum(stat["answered_tests"] for stat in question_set_statistics.values())
+
+        return {
+            "name": name,
+            "configuration": configuration,
+            "chunk_count": chunk_count,
+            "chunk_embeddings_computed": self.embedding_model.computed_count - computed_before,
+            "chunk_embeddings_reused": self.embedding_model.reused_count - reused_before,
+            "chunker_embeddings_computed": self.chunker_embedding_model.computed_count - chunker_computed_before,
+            "chunker_embeddings_reused": self.chunker_embedding_model.reused_count - chunker_reused_before,
+            "ingestion_time_s": ingestion_time,
+            "total_tests": total_tests,
+            "failed_tests": total_tests - answered_tests,
+            "correct_context_percentage": self._percentage(question_set_statistics, "correct_context", answered_tests),
+            "correct_expected_answer_percentage": self._percentage(
+                question_set_statistics, "correct_expected_answer", answered_tests),
+            "correct_keywords_percentage": self._percentage(question_set_statistics, "correct_keywords", answered_tests),
+            "fully_correct_percentage": self._percentage(question_set_statistics, "fully_correct_number", answered_tests),
+            "average_prompt_tokens": self._weighted_average(
+                question_set_statistics, "total_prompt_tokens_used", answered_tests),
+            "average_response_time": self._weighted_average(
+                question_set_statistics, "total_response_time", answered_tests),
+            "average_latency": self._weighted_average(question_set_statistics, "total_latency", answered_tests),
+            "question_sets": question_set_statistics
+        }
+
+    @staticmethod
+    def _drop_collection(rag):
+        try:
+            if rag.vectorstore.client.has_collection(rag.vectorstore.collection_name):
+                rag.clear_vectorstore()
+        except Exception as error:
+            log.error(f"Failed to drop temporary collection {rag.vectorstore.collection_name}: {error}")
+
+    def _show_report(self):
+        log.always(f"Chunking sweep results for {len(self.sweep_results)} configurations:")
+        for result in self.sweep_results:
+            if result.get("error"):
+                log.always(f"{result['name']}: failed with {result['error']}")
+                continue
+            log.always(
+                f"{result['name']}: "
+                f"chunks {Fore.LIGHTBLUE_EX}{result['chunk_count']}{Fore.RESET}, "
+                f"fully correct {Fore.LIGHTBLUE_EX}{result['fully_correct_percentage']:.2f}%{Fore.RESET}, "
+                f"expected answer {Fore.LIGHTBLUE_EX}{result['correct_expected_answer_percentage']:.2f}%{Fore.RESET}, "
+                f"avg prompt tokens {Fore.LIGHTBLUE_EX}{result['average_prompt_tokens']:.2f}{Fore.RESET}, "
+                f"avg latency {Fore.LIGHTBLUE_EX}{result['average_latency']:.2f}s{Fore.RESET}, "
+                f"failed tests {Fore.LIGHTBLUE_EX}{result['failed_tests']}{Fore.RESET}, "
+                f"chunk embeddings computed/reused "
+                f"{result['chunk_embeddings_computed']}/{result['chunk_embeddings_reused']}")
+
+    @staticmethod
+    def _percentage(question_set_statistics, key, answered_tests):
+        count = sum(stat.get(key, 0) for stat in question_set_statistics.values())
+        return (count / answered_tests * 100) if answered_tests > 0 else 0
+
+    @staticmethod
+    def _weighted_average(question_set_statistics, key, total_tests):
+        total = sum(stat.get(key, 0) for stat in question_set_statistics.values())
+        return total / total_tests if total_tests > 0 else 0
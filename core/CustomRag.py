@@ -4,11 +4,14 @@ from langchain_experimental.text_splitter import SemanticChunker
 from langchain_milvus import Milvus
 from langchain_ollama import OllamaEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pymilvus import MilvusException
 from pypdf import PdfReader
 
-from core.AdjustedOllama import AdjustedOllama
+from core.AdjustedOllama import AdjustedOllama, OLLAMA_RETRY_ON
+from core.ResilientExecutor import ResilientExecutor, RetryBudget, DEFAULT_MAX_RETRIES, DEFAULT_RETRY_ON
+from core.ChatSession import ChatSession, DEFAULT_KEEP_ALIVE, DEFAULT_HISTORY_TOKEN_BUDGET
 from utils.CustomLogger import log
-from utils.utils import load_files
+from utils.utils import load_files, save_snapshot, load_snapshot, snapshot_path, get_current_datetime
 
 # DEFAULT_MODEL = "llama3.1"
 # DEFAULT_MODEL = "deepseek-r1:8b"
@@ -19,15 +22,38 @@ DEFAULT_EMBEDDING_MODEL = "embeddinggemma"
 DEFAULT_BASE_URL = "localhost:11434"
 DEFAULT_COLLECTION_NAME = "rag_collection"
 DEFAULT_MILVUS_URI = "http://localhost:19530"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_BATCH_SIZE = 1000
+INGESTION_BATCH_SIZE = 100
+RETRIEVAL_K = 10
+DEFAULT_OLLAMA_TIMEOUT_S = 180
+DEFAULT_MILVUS_TIMEOUT_S = 15
+MILVUS_RETRY_ON = (*DEFAULT_RETRY_ON, MilvusException)
 
 
 class CustomRag:
     def __init__(self,
-                 embedding_model=OllamaEmbeddings(model=DEFAULT_EMBEDDING_MODEL, base_url=DEFAULT_BASE_URL),
+                 embedding_model=OllamaEmbeddings(model=DEFAULT_EMBEDDING_MODEL, base_url=DEFAULT_BASE_URL,
+                                                  client_kwargs={"timeout": DEFAULT_OLLAMA_TIMEOUT_S}),
                  split_chunk_size=1000,
                  split_chunk_overlap=200,
+                 semantic_breakpoint_threshold_amount=0.9,
+                 semantic_min_chunk_size=900,
+                 chunker_embedding_model=None,
                  collection_name=DEFAULT_COLLECTION_NAME,
-                 connection_uri=DEFAULT_MILVUS_URI):
+                 connection_uri=DEFAULT_MILVUS_URI,
+                 ollama_timeout_s=DEFAULT_OLLAMA_TIMEOUT_S,
+                 milvus_timeout_s=DEFAULT_MILVUS_TIMEOUT_S,
+                 max_retries=DEFAULT_MAX_RETRIES,
+                 retrieval_hedge_after_s=None):
+
+        self.embedding_model = embedding_model
+        self.chunker_settings = {
+            "split_chunk_size": split_chunk_size,
+            "split_chunk_overlap": split_chunk_overlap,
+            "semantic_breakpoint_threshold_amount": semantic_breakpoint_threshold_amount,
+            "semantic_min_chunk_size": semantic_min_chunk_size
+        }
 
         self.vectorstore = Milvus(
             embedding_function=embedding_model,
@@ -37,10 +63,21 @@ class CustomRag:
             drop_old=False
         )
 
-        self.retriever = self.vectorstore.as_retriever(
-            search_kwargs={
-                "k": 10,
-            }
+        self.retry_budget = RetryBudget()
+        self.ollama_executor = ResilientExecutor(
+            "ollama",
+            timeout_s=ollama_timeout_s,
+            max_retries=max_retries,
+            retry_on=OLLAMA_RETRY_ON,
+            retry_budget=self.retry_budget
+        )
+        self.milvus_executor = ResilientExecutor(
+            "milvus",
+            timeout_s=milvus_timeout_s,
+            max_retries=max_retries,
+            hedge_after_s=retrieval_hedge_after_s,
+            retry_on=MILVUS_RETRY_ON,
+            retry_budget=self.retry_budget
         )
 
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -52,106 +89,258 @@ class CustomRag:
         )
 
         self.semantic_chunker = SemanticChunker(
-            embeddings=embedding_model,
+            embeddings=chunker_embedding_model if chunker_embedding_model is not None else embedding_model,
             breakpoint_threshold_type="percentile",
-            breakpoint_threshold_amount=0.9,
-            min_chunk_size=900
+            breakpoint_threshold_amount=semantic_breakpoint_threshold_amount,
+            min_chunk_size=semantic_min_chunk_size
         )
 
-        self.adjusted_model = AdjustedOllama(DEFAULT_MODEL)
+        self.adjusted_model = AdjustedOllama(DEFAULT_MODEL, executor=self.ollama_executor)
 
     def load_text_files(self, path="documents/universe", doc_type="universe", use_semantic=False):
-        extractor = self._extract_text_from_txt_semantic if use_semantic else self._extract_text_from_txt
         self._load_documents(
             path=path,
             file_type="txt",
             doc_type=doc_type,
-            extractor=extractor
+            use_semantic=use_semantic
         )
 
     def load_pdf_files(self, path="documents/rfc", doc_type="RFC", use_semantic=False):
-        extractor = self._extract_text_from_pdf_semantic if use_semantic else self._extract_text_from_pdf
         self._load_documents(
             path=path,
             file_type="pdf",
             doc_type=doc_type,
-            extractor=extractor
+            use_semantic=use_semantic
         )
 
-    def _load_documents(self, path, file_type, doc_type, extractor):
+    def _load_documents(self, path, file_type, doc_type, use_semantic):
         log.loading(f"Loading {doc_type} documents")
+        extracted_files = self.extract_files(path, file_type)
+        self.add_extracted_files(extracted_files, use_semantic)
+
+    @staticmethod
+    def extract_files(path, file_type):
         files = load_files(path, file_type)
         log.info(f"Found {len(files)} files in the documents directory")
 
-        all_chunks = []
+        reader = CustomRag._read_pdf_pages if file_type == "pdf" else CustomRag._read_txt_pages
+        extracted_files = []
         for file in files:
             log.loading(f"Processing file: {file.name}")
-            chunks = extractor(file)
+            extracted_files.append({
+                "name": file.name,
+                "file_type": file_type,
+                "pages": reader(file)
+            })
+        return extracted_files
+
+    def add_extracted_files(self, extracted_files, use_semantic=False):
+        all_chunks = []
+        for extracted_file in extracted_files:
+            chunks = self._split_extracted_file(extracted_file, use_semantic)
             all_chunks.extend(chunks)
 
         log.info(f"Created {len(all_chunks)} text chunks")
         log.loading(f"Adding documents to vector store")
-        self.vectorstore.add_documents(all_chunks)
+        for start in range(0, len(all_chunks), INGESTION_BATCH_SIZE):
+            batch = all_chunks[start:start + INGESTION_BATCH_SIZE]
+            texts = [chunk.page_content for chunk in batch]
+            embeddings = self.ollama_executor.call(self.embedding_model.embed_documents, texts)
+            self.milvus_executor.call(
+                self.vectorstore.add_embeddings,
+                texts=texts,
+                embeddings=embeddings,
+                metadatas=[chunk.metadata for chunk in batch],
+                timeout=self.milvus_executor.timeout_s,
+                idempotent=False
+            )
+        return len(all_chunks)
 
-    def _extract_text_from_txt(self, file):
-        text = file.read_text(encoding="utf-8")
-        return self.text_splitter.create_documents(
-            [text],
-            metadatas=[{"source": file.name}]
-        )
+    def _split_extracted_file(self, extracted_file, use_semantic):
+        name = extracted_file["name"]
+        pages = extracted_file["pages"]
 
-    def _extract_text_from_txt_semantic(self, file):
-        text = file.read_text(encoding="utf-8")
-        return self.semantic_chunker.create_documents(
-            [text],
-            metadatas=[{"source": file.name}]
-        )
+        if extracted_file["file_type"] != "pdf":
+            splitter = self.semantic_chunker if use_semantic else self.text_splitter
+            return splitter.create_documents(
+                ["".join(pages)],
+                metadatas=[{"source": name}]
+            )
+
+        if use_semantic:
+            full_text = "".join(text + "\n" for text in pages)
+            return self.semantic_chunker.create_documents(
+                [full_text],
+                metadatas=[{"source": name}]
+            )
 
-    def _extract_text_from_pdf(self, file):
         chunks = []
-        pdf_reader = PdfReader(file)
-        for page_num, page in enumerate(pdf_reader.pages, start=1):
-            text = page.extract_text()
-            text = re.sub(r'\n+', '\n', text)
+        for page_num, text in enumerate(pages, start=1):
             page_chunks = self.text_splitter.create_documents(
                 [text],
-                metadatas=[{"source": f"{file.name} - page {page_num}"}]
+                metadatas=[{"source": f"{name} - page {page_num}"}]
             )
             chunks.extend(page_chunks)
         return chunks
 
-    def _extract_text_from_pdf_semantic(self, file):
-        pdf_reader = PdfReader(file)
+    @staticmethod
+    def _read_txt_pages(file):
+        return [file.read_text(encoding="utf-8")]
 
-        full_text = ""
-        for page_num, page in enumerate(pdf_reader.pages, start=1):
+    @staticmethod
+    def _read_pdf_pages(file):
+        pages = []
+        pdf_reader = PdfReader(file)
+        for page in pdf_reader.pages:
             text = page.extract_text()
-            text = re.sub(r'\n+', '\n', text)
-            full_text += text + "\n"
+            pages.append(re.sub(r'\n+', '\n', text))
+        return pages
+
+    def export_snapshot(self, file_path):
+        file_path = snapshot_path(file_path)
+        collection_name = self.vectorstore.collection_name
+        log.loading(f"Exporting collection {collection_name} to {file_path}")
+        client = self.vectorstore.client
+        if not client.has_collection(collection_name):
+            raise ValueError(f"Collection {collection_name} does not exist, nothing to export")
 
-        return self.semantic_chunker.create_documents(
-            [full_text],
-            metadatas=[{"source": file.name}]
+        text_field = self.vectorstore._text_field
+        vector_field = self.vectorstore._vector_field
+        primary_field = self.vectorstore._primary_field
+        fields = [field["name"] for field in client.describe_collection(collection_name)["fields"]]
+        metadata_fields = [field for field in fields if field not in {primary_field, text_field, vector_field}]
+
+        vectors = []
+        texts = []
+        metadatas = []
+        iterator = client.query_iterator(
+            collection_name=collection_name,
+            batch_size=SNAPSHOT_BATCH_SIZE,
+            filter="",
+            output_fields=[text_field, vector_field, *metadata_fields]
         )
+        while True:
+            rows = iterator.next()
+            if not rows:
+                iterator.close()
+                break
+            for row in rows:
+                vectors.append(row[vector_field])
+                texts.append(row[text_field])
+                metadatas.append({field: row[field] for field in metadata_fields if field in row})
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "collection_name": collection_name,
+            "embedding_model": self._embedding_model_name(),
+            "dimension": len(vectors[0]) if vectors else 0,
+            "count": len(texts),
+            "chunker_settings": self.chunker_settings,
+            "created_at": get_current_datetime()
+        }
+        save_snapshot(file_path, vectors, texts, metadatas, manifest)
+        log.info(f"Exported {len(texts)} chunks to {file_path}")
+
+        return manifest
+
+    def import_snapshot(self, file_path):
+        file_path = snapshot_path(file_path)
+        log.loading(f"Importing snapshot {file_path}")
+        manifest, vectors, texts, metadatas = load_snapshot(file_path)
+
+        if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {manifest.get('format_version')}")
+        if manifest.get("embedding_model") != self._embedding_model_name():
+            raise ValueError(
+                f"Snapshot was created with embedding model {manifest.get('embedding_model')}, "
+                f"but the current embedding model is {self._embedding_model_name()}")
+
+        # Checked before inserting anything, a partial import would leave the collection non-empty
+        if not (vectors.shape[0] == len(texts) == len(metadatas) == manifest.get("count")):
+            raise ValueError(
+                f"Snapshot is inconsistent: {vectors.shape[0]} vectors, {len(texts)} texts and "
+                f"{len(metadatas)} metadata entries, but the manifest lists {manifest.get('count')} chunks")
+        if len(texts) > 0 and (vectors.ndim != 2 or vectors.shape[1] != manifest.get("dimension")):
+            raise ValueError(
+                f"Snapshot vectors have shape {vectors.shape}, "
+                f"but the manifest lists dimension {manifest.get('dimension')}")
+
+        collection_name = self.vectorstore.collection_name
+        client = self.vectorstore.client
+        if client.has_collection(collection_name) and client.get_collection_stats(collection_name).get("row_count", 0) > 0:
+            raise ValueError(f"Collection {collection_name} is not empty, clear it before importing a snapshot")
+
+        if manifest.get("chunker_settings") != self.chunker_settings:
+            log.info(f"Snapshot chunker settings {manifest.get('chunker_settings')} differ from the current ones")
+
+        for start in range(0, len(texts), SNAPSHOT_BATCH_SIZE):
+            end = start + SNAPSHOT_BATCH_SIZE
+            self.milvus_executor.call(
+                self.vectorstore.add_embeddings,
+                texts=texts[start:end],
+                embeddings=vectors[start:end].tolist(),
+                metadatas=metadatas[start:end],
+                timeout=self.milvus_executor.timeout_s,
+                idempotent=False
+            )
+        log.info(f"Imported {len(texts)} chunks into {collection_name}")
+
+        return manifest
+
+    def get_resilience_statistics(self):
+        return {
+            "ollama": self.ollama_executor.get_statistics(),
+            "milvus": self.milvus_executor.get_statistics(),
+            "retry_budget": self.retry_budget.get_statistics()
+        }
+
+    def _embedding_model_name(self):
+        return getattr(self.embedding_model, "model", type(self.embedding_model).__name__)
 
     def clear_vectorstore(self):
         log.loading(f"Clearing vector store")
         self.vectorstore.drop()
         log.info(f"Vector store cleared")
 
-    def ask(self, question):
-        documents = self._find_relevant_documents(question)
+    def start_session(self, keep_alive=DEFAULT_KEEP_ALIVE, history_token_budget=DEFAULT_HISTORY_TOKEN_BUDGET):
+        session = ChatSession(
+            DEFAULT_MODEL,
+            embedding_model=self._embedding_model_name(),
+            embedding_base_url=getattr(self.embedding_model, "base_url", None) or DEFAULT_BASE_URL,
+            keep_alive=keep_alive,
+            history_token_budget=history_token_budget,
+            executor=self.ollama_executor
+        )
+        session.warm_up()
+        return session
+
+    def ask(self, question, session=None):
+        retrieval_query = session.get_retrieval_query(question) if session is not None else question
+        documents = self._find_relevant_documents(retrieval_query, session)
         log.documents("Found documents:")
         for doc in documents:
             log.documents(f"{" " * 6} - {doc.replace("\n", " ")}")
         log.loading(f"Preparing context for LLM")
         concatenated_documents = "\n\n".join(documents)
         log.loading(f"Generating answer with LLM")
-        answer, details = self.adjusted_model.ask_ollama(concatenated_documents, question)
+        if session is not None:
+            answer, details = session.ask(concatenated_documents, question)
+        else:
+            answer, details = self.adjusted_model.ask_ollama(concatenated_documents, question)
         return answer, documents, details
 
-    def _find_relevant_documents(self, question):
+    def _find_relevant_documents(self, question, session=None):
         log.loading(f"Retrieving documents for query: '{question}'")
-        documents = self.retriever.invoke(question)
+        if session is not None:
+            vector = session.embed_query(question)
+        else:
+            vector = self.ollama_executor.call(self.embedding_model.embed_query, question)
+        documents = self.milvus_executor.call(
+            self.vectorstore.similarity_search_by_vector,
+            vector,
+            k=RETRIEVAL_K,
+            timeout=self.milvus_executor.timeout_s,
+            hedge=True
+        )
         log.info(f"Retrieved {len(documents)} relevant documents for the query")
         return [doc.page_content for doc in documents]
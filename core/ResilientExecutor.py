@@ -0,0 +1,210 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.CustomLogger import log
+
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE_S = 0.5
+DEFAULT_BACKOFF_MAX_S = 8.0
+DEFAULT_RETRY_ON = (TimeoutError, ConnectionError)
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class RetryBudget:
+    def __init__(self, retry_ratio=0.2, min_retries=10):
+        self.retry_ratio = retry_ratio
+        self.min_retries = min_retries
+        self.calls = 0
+        self.retries = 0
+
+    def record_call(self):
+        self.calls = self.calls + 1
+
+    def try_acquire(self):
+        if self.retries >= self.min_retries + self.retry_ratio * self.calls:
+            return False
+        self.retries = self.retries + 1
+        return True
+
+    def get_statistics(self):
+        return {
+            "calls": self.calls,
+            "retries": self.retries
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout_s=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = CircuitBreaker.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+
+    def allow_request(self):
+        # Once the reset timeout has passed a single trial call is let through, every other call is
+        # rejected until that trial is recorded as a success or a failure
+        if self.state == CircuitBreaker.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            self.state = CircuitBreaker.HALF_OPEN
+            return True
+        return self.state == CircuitBreaker.CLOSED
+
+    def release_trial(self):
+        # The trial ended without telling anything about the backend, let the next call try again
+        if self.state == CircuitBreaker.HALF_OPEN:
+            self.state = CircuitBreaker.OPEN
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.state = CircuitBreaker.CLOSED
+
+    def record_failure(self):
+        self.consecutive_failures = self.consecutive_failures + 1
+        if self.state == CircuitBreaker.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitBreaker.OPEN:
+                self.open_count = self.open_count + 1
+            self.state = CircuitBreaker.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilientExecutor:
+    def __init__(self,
+                 name,
+                 timeout_s=None,
+                 max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base_s=DEFAULT_BACKOFF_BASE_S,
+                 backoff_max_s=DEFAULT_BACKOFF_MAX_S,
+                 hedge_after_s=None,
+                 retry_on=DEFAULT_RETRY_ON,
+                 retry_budget=None,
+                 circuit_breaker=None):
+        self.name = name
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.hedge_after_s = hedge_after_s
+        self.retry_on = retry_on
+        self.retry_budget = retry_budget if retry_budget is not None else RetryBudget()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        # Timed out attempts cannot be killed, they are abandoned and keep a worker until the client gives up
+        self.pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix=name)
+        self.statistics = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "non_retryable_errors": 0,
+            "timeouts": 0,
+            "hedged_requests": 0,
+            "hedge_wins": 0,
+            "circuit_open_rejections": 0,
+            "retry_budget_exhausted": 0
+        }
+
+    def call(self, function, *args, timeout_s=None, hedge=False, idempotent=True, **kwargs):
+        timeout_s = timeout_s if timeout_s is not None else self.timeout_s
+        self.statistics["calls"] = self.statistics["calls"] + 1
+        self.retry_budget.record_call()
+
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                self.statistics["circuit_open_rejections"] = self.statistics["circuit_open_rejections"] + 1
+                self.statistics["failures"] = self.statistics["failures"] + 1
+                raise CircuitOpenError(f"{self.name} is unavailable, circuit breaker is open")
+
+            # A half-open trial must be a single request, so it is never hedged
+            trial_hedge = hedge and self.circuit_breaker.state == CircuitBreaker.CLOSED
+            try:
+                result = self._attempt(function, args, kwargs, timeout_s, trial_hedge)
+            except Exception as error:
+                if not isinstance(error, self.retry_on):
+                    self.circuit_breaker.release_trial()
+                    self.statistics["non_retryable_errors"] = self.statistics["non_retryable_errors"] + 1
+                    self.statistics["failures"] = self.statistics["failures"] + 1
+                    raise
+
+                self.circuit_breaker.record_failure()
+                # A write that ran past its deadline may still have been applied, so retrying could duplicate it
+                if attempt >= self.max_retries or (not idempotent and isinstance(error, DeadlineExceededError)):
+                    self.statistics["failures"] = self.statistics["failures"] + 1
+                    raise
+                if not self.retry_budget.try_acquire():
+                    self.statistics["retry_budget_exhausted"] = self.statistics["retry_budget_exhausted"] + 1
+                    self.statistics["failures"] = self.statistics["failures"] + 1
+                    raise
+
+                attempt = attempt + 1
+                self.statistics["retries"] = self.statistics["retries"] + 1
+                delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+                log.error(f"{self.name} call failed: {error}. Retry {attempt} of {self.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+            else:
+                self.circuit_breaker.record_success()
+                self.statistics["successes"] = self.statistics["successes"] + 1
+                return result
+
+    def _attempt(self, function, args, kwargs, timeout_s, hedge):
+        hedge = hedge and self.hedge_after_s is not None
+        if timeout_s is None and not hedge:
+            return function(*args, **kwargs)
+
+        deadline = time.monotonic() + timeout_s if timeout_s is not None else None
+        primary = self.pool.submit(function, *args, **kwargs)
+        pending = {primary}
+
+        if hedge:
+            done, _ = wait(pending, timeout=self._remaining(deadline, self.hedge_after_s))
+            if not done and (deadline is None or time.monotonic() < deadline):
+                self.statistics["hedged_requests"] = self.statistics["hedged_requests"] + 1
+                pending.add(self.pool.submit(function, *args, **kwargs))
+
+        last_error = None
+        while pending:
+            remaining = self._remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self.statistics["hedge_wins"] = self.statistics["hedge_wins"] + 1
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                last_error = future.exception()
+
+        if pending:
+            for other in pending:
+                other.cancel()
+            self.statistics["timeouts"] = self.statistics["timeouts"] + 1
+            raise DeadlineExceededError(f"{self.name} call exceeded the {timeout_s}s deadline")
+        raise last_error
+
+    def get_statistics(self):
+        return {
+            **self.statistics,
+            "circuit_state": self.circuit_breaker.state,
+            "circuit_open_count": self.circuit_breaker.open_count
+        }
+
+    @staticmethod
+    def _remaining(deadline, limit=None):
+        if deadline is None:
+            return limit
+        remaining = deadline - time.monotonic()
+        return remaining if limit is None else min(remaining, limit)
@@ -1,4 +1,5 @@
 import os
+import time
 
 from colorama import Fore
 
@@ -10,12 +11,18 @@ from utils.utils import save_json, get_current_datetime
 class TestRunner:
     def __init__(self, rag_instance, model):
         self.rag = rag_instance
-        self.adjusted_model = AdjustedOllama(model)
+        self.adjusted_model = AdjustedOllama(model, executor=self.rag.ollama_executor)
         self.tests_results = {}
+        self.resilience_baseline = {}
+        self.start_run()
 
         if not os.path.exists("../tests/results"):
             os.makedirs("../tests/results")
 
+    def start_run(self):
+        self.tests_results = {}
+        self.resilience_baseline = self.rag.get_resilience_statistics()
+
     def run_test(self, details):
         question, expected_answer, keywords = self._separate_question(details)
 
@@ -23,8 +30,38 @@ class TestRunner:
             f"Question: {question}, Expected Answer: {expected_answer}, Keywords: {keywords}")
 
         current_test_number = len(self.tests_results) + 1
-        answer, docs, details = self.rag.ask(question)
+        answer, docs, details, latency = "", [], {}, 0
+        correct_context, correct_expected_answer, correct_keywords = False, False, False
+        error = None
+
+        try:
+            start_time = time.time()
+            answer, docs, details = self.rag.ask(question)
+            latency = time.time() - start_time
+
+            correct_context, correct_expected_answer, correct_keywords = self._validate_answer(
+                question, answer, docs, expected_answer, keywords)
+        except Exception as exception:
+            error = str(exception)
+            log.error(f"Question: \"{question}\" failed: {error}")
+
+        self.tests_results[current_test_number] = {
+            "question": question,
+            "details": details,
+            "latency_s": latency,
+            "expected_answer": expected_answer,
+            "keywords": keywords,
+            "answer": answer,
+            "is_correct_based_on_context": correct_context,
+            "is_correct_based_on_expected_answer": correct_expected_answer,
+            "is_correct_based_on_keywords": correct_keywords,
+            "used_documents": docs,
+            "error": error
+        }
+
+        return answer
 
+    def _validate_answer(self, question, answer, docs, expected_answer, keywords):
         correct_context = self.adjusted_model.validate_answer_with_context(answer, "\n\n".join(docs))
 
         correct_expected_answer = False
@@ -40,30 +77,19 @@ class TestRunner:
         else:
             log.error(f"Question: \"{question}\" is missing expected keywords.")
 
-        self.tests_results[current_test_number] = {
-            "question": question,
-            "details": details,
-            "expected_answer": expected_answer,
-            "keywords": keywords,
-            "answer": answer,
-            "is_correct_based_on_context": correct_context,
-            "is_correct_based_on_expected_answer": correct_expected_answer,
-            "is_correct_based_on_keywords": correct_keywords,
-            "used_documents": docs
-        }
-
-        return answer
+        return correct_context, correct_expected_answer, correct_keywords
 
     def multirun_tests(self, test_set, run_number):
         statistics = []
         for i in range(run_number):
             log.always(f"Running test set iteration {i + 1} of {run_number}...")
-            self.tests_results = {}
+            self.start_run()
             for test in test_set:
                 self.run_test(test)
             statistics.append(self.generate_summary(save_summary=False, show_summary=False))
 
         total_tests = 0
+        total_answered_tests = 0
         total_correct_context = 0
         total_correct_expected_answer = 0
         total_correct_keywords = 0
@@ -76,6 +102,7 @@ class TestRunner:
 
         for stat in statistics:
             total_tests = total_tests + stat.get("total_tests", 0)
+            total_answered_tests = total_answered_tests + stat.get("answered_tests", 0)
             total_correct_context = total_correct_context + stat.get("correct_context", 0)
             total_correct_expected_answer = total_correct_expected_answer + stat.get("correct_expected_answer", 0)
             total_correct_keywords = total_correct_keywords + stat.get("correct_keywords", 0)
@@ -87,16 +114,19 @@ class TestRunner:
             total_incorrect = total_incorrect + stat.get("incorrect_number", 0)
         log.always(f"After {run_number} runs of the test set:")
         log.always(f"Total tests: {total_tests}")
+        log.always(f"Failed tests (backend errors): {total_tests - total_answered_tests}")
         log.always(
-            f"Average correct based on context: {Fore.LIGHTBLUE_EX}{total_correct_context / run_number:.2f} ({(total_correct_context / total_tests * 100):.2f}%)")
+            f"Average correct based on context: {Fore.LIGHTBLUE_EX}{total_correct_context / run_number:.2f} ({self._calculate_percentage_in_total_tests(total_correct_context, total_answered_tests):.2f}%)")
         log.always(
-            f"Average correct based on expected Answer: {Fore.LIGHTBLUE_EX}{total_correct_expected_answer / run_number:.2f} ({(total_correct_expected_answer / total_tests * 100):.2f}%)")
+            f"Average correct based on expected Answer: {Fore.LIGHTBLUE_EX}{total_correct_expected_answer / run_number:.2f} ({self._calculate_percentage_in_total_tests(total_correct_expected_answer, total_answered_tests):.2f}%)")
         log.always(
-            f"Average correct based on keywords: {Fore.LIGHTBLUE_EX}{total_correct_keywords / run_number:.2f} ({(total_correct_keywords / total_tests * 100):.2f}%)")
+            f"Average correct based on keywords: {Fore.LIGHTBLUE_EX}{total_correct_keywords / run_number:.2f} ({self._calculate_percentage_in_total_tests(total_correct_keywords, total_answered_tests):.2f}%)")
 
         stats_summary = {
             "total_runs": run_number,
             "total_tests": total_tests,
+            "total_answered_tests": total_answered_tests,
+            "total_failed_tests": total_tests - total_answered_tests,
             "total_correct_context": total_correct_context,
             "total_correct_expected_answer": total_correct_expected_answer,
             "total_correct_keywords": total_correct_keywords,
@@ -139,16 +169,28 @@ class TestRunner:
         mostly_correct = []
         partially_correct = []
         incorrect = []
+        failed = []
         response_time = 0
+        latency = 0
         token_usage = 0
         total_tests = len(self.tests_results)
-        model_name = self.tests_results.get(1)["details"].get("model", "unknown") if total_tests > 0 else "unknown"
+        failed_tests = sum(1 for result in self.tests_results.values() if result.get("error"))
+        answered_tests = total_tests - failed_tests
+        resilience_statistics = self._statistics_since(self.rag.get_resilience_statistics(), self.resilience_baseline)
+        model_name = next((result["details"].get("model", "unknown") for result in self.tests_results.values()
+                           if not result.get("error")), "unknown")
         correct_context = sum(1 for result in self.tests_results.values() if result["is_correct_based_on_context"])
         correct_expected_answer = sum(
             1 for result in self.tests_results.values() if result["is_correct_based_on_expected_answer"])
         correct_keywords = sum(1 for result in self.tests_results.values() if result["is_correct_based_on_keywords"])
 
         for result in self.tests_results.values():
+            # Failed tests never got an answer, they are reported only through failed_tests
+            # and stay out of the correctness buckets, timings and token counts
+            if result.get("error"):
+                failed.append(result["question"])
+                continue
+
             correct_count = sum([
                 result["is_correct_based_on_context"],
                 result["is_correct_based_on_expected_answer"],
@@ -164,36 +206,53 @@ class TestRunner:
                 incorrect.append(result["question"])
 
             response_time = response_time + float(result["details"].get("total_duration_s", 0))
+            latency = latency + result.get("latency_s", 0)
             token_usage = token_usage + int(result["details"].get("prompt_eval_count", 0))
 
-        average_response_time = response_time / total_tests if total_tests > 0 else 0
-        average_token_usage = token_usage / total_tests if total_tests > 0 else 0
+        average_response_time = response_time / answered_tests if answered_tests > 0 else 0
+        average_latency = latency / answered_tests if answered_tests > 0 else 0
+        average_token_usage = token_usage / answered_tests if answered_tests > 0 else 0
 
         if show_summary:
             log.always(f"Total tests: {total_tests}")
+            log.always(f"Failed tests (backend errors): {Fore.LIGHTBLUE_EX}{failed_tests}")
+            for backend in ("ollama", "milvus"):
+                backend_statistics = resilience_statistics[backend]
+                log.always(
+                    f"{backend.capitalize()} calls: {Fore.LIGHTBLUE_EX}{backend_statistics['calls']}{Fore.RESET}, "
+                    f"retries: {Fore.LIGHTBLUE_EX}{backend_statistics['retries']}{Fore.RESET}, "
+                    f"timeouts: {Fore.LIGHTBLUE_EX}{backend_statistics['timeouts']}{Fore.RESET}, "
+                    f"hedged: {Fore.LIGHTBLUE_EX}{backend_statistics['hedged_requests']}{Fore.RESET}, "
+                    f"circuit rejections: {Fore.LIGHTBLUE_EX}{backend_statistics['circuit_open_rejections']}")
             log.always(f"Average response time: {Fore.LIGHTBLUE_EX}{average_response_time:.2f} seconds")
+            log.always(f"Average latency (retrieval + generation): {Fore.LIGHTBLUE_EX}{average_latency:.2f} seconds")
             log.always(f"Total prompt tokens used: {Fore.LIGHTBLUE_EX}{token_usage}")
             log.always(f"Average prompt tokens per test: {Fore.LIGHTBLUE_EX}{average_token_usage:.2f}")
             log.always(
-                f"Correct based on context: {Fore.LIGHTBLUE_EX}{correct_context} ({self._calculate_percentage_in_total_tests(correct_context):.2f}%)")
+                f"Correct based on context: {Fore.LIGHTBLUE_EX}{correct_context} ({self._calculate_percentage_in_total_tests(correct_context, answered_tests):.2f}%)")
             log.always(
-                f"Correct based on expected answer: {Fore.LIGHTBLUE_EX}{correct_expected_answer} ({self._calculate_percentage_in_total_tests(correct_expected_answer):.2f}%)")
+                f"Correct based on expected answer: {Fore.LIGHTBLUE_EX}{correct_expected_answer} ({self._calculate_percentage_in_total_tests(correct_expected_answer, answered_tests):.2f}%)")
             log.always(
-                f"Correct based on keywords: {Fore.LIGHTBLUE_EX}{correct_keywords} ({self._calculate_percentage_in_total_tests(correct_keywords):.2f}%)")
+                f"Correct based on keywords: {Fore.LIGHTBLUE_EX}{correct_keywords} ({self._calculate_percentage_in_total_tests(correct_keywords, answered_tests):.2f}%)")
             log.always(
-                f"Fully correct (correct 3/3): {Fore.LIGHTBLUE_EX}{len(fully_correct)} ({self._calculate_percentage_in_total_tests(len(fully_correct)):.2f}%)")
+                f"Fully correct (correct 3/3): {Fore.LIGHTBLUE_EX}{len(fully_correct)} ({self._calculate_percentage_in_total_tests(len(fully_correct), answered_tests):.2f}%)")
             log.always(
-                f"Mostly correct (correct 2/3): {Fore.LIGHTBLUE_EX}{len(mostly_correct)} ({self._calculate_percentage_in_total_tests(len(mostly_correct)):.2f}%)")
+                f"Mostly correct (correct 2/3): {Fore.LIGHTBLUE_EX}{len(mostly_correct)} ({self._calculate_percentage_in_total_tests(len(mostly_correct), answered_tests):.2f}%)")
             log.always(
-                f"Partially correct (correct 1/3): {Fore.LIGHTBLUE_EX}{len(partially_correct)} ({self._calculate_percentage_in_total_tests(len(partially_correct)):.2f}%)")
+                f"Partially correct (correct 1/3): {Fore.LIGHTBLUE_EX}{len(partially_correct)} ({self._calculate_percentage_in_total_tests(len(partially_correct), answered_tests):.2f}%)")
             log.always(
-                f"Incorrect (correct 0/3): {Fore.LIGHTBLUE_EX}{len(incorrect)} ({self._calculate_percentage_in_total_tests(len(incorrect)):.2f}%)")
+                f"Incorrect (correct 0/3): {Fore.LIGHTBLUE_EX}{len(incorrect)} ({self._calculate_percentage_in_total_tests(len(incorrect), answered_tests):.2f}%)")
 
         statistics = {
             "model": model_name,
             "total_tests": total_tests,
+            "failed_tests": failed_tests,
+            "answered_tests": answered_tests,
+            "resilience": resilience_statistics,
             "total_response_time": response_time,
             "response_time_average": average_response_time,
+            "total_latency": latency,
+            "latency_average": average_latency,
             "total_prompt_tokens_used": token_usage,
             "average_prompt_tokens_per_test": average_token_usage,
             "correct_context": correct_context,
@@ -206,7 +265,9 @@ class TestRunner:
             "partially_correct_number": len(partially_correct),
             "partially_correct": partially_correct,
             "incorrect_number": len(incorrect),
-            "incorrect": incorrect
+            "incorrect": incorrect,
+            "failed_number": len(failed),
+            "failed": failed
         }
 
         if save_summary:
@@ -223,6 +284,7 @@ class TestRunner:
             all_questions.update(stat.get("mostly_correct", []))
             all_questions.update(stat.get("partially_correct", []))
             all_questions.update(stat.get("incorrect", []))
+            all_questions.update(stat.get("failed", []))
 
         total_runs = len(statistics)
 
@@ -231,12 +293,15 @@ class TestRunner:
             mostly_correct_count = sum(1 for stat in statistics if question in stat.get("mostly_correct", []))
             partially_correct_count = sum(1 for stat in statistics if question in stat.get("partially_correct", []))
             incorrect_count = sum(1 for stat in statistics if question in stat.get("incorrect", []))
+            failed_count = sum(1 for stat in statistics if question in stat.get("failed", []))
+            # Runs that failed on a backend error say nothing about answer quality
+            answered_runs = total_runs - failed_count
 
             success_count = fully_correct_count + mostly_correct_count
 
             category_counts = [fully_correct_count, mostly_correct_count, partially_correct_count, incorrect_count]
             max_category = max(category_counts)
-            stability_score = max_category / total_runs if total_runs > 0 else 0
+            stability_score = max_category / answered_runs if answered_runs > 0 else 0
 
             categories = ["fully_correct", "mostly_correct", "partially_correct", "incorrect"]
             dominant_category = categories[category_counts.index(max_category)]
@@ -247,15 +312,17 @@ class TestRunner:
                 "mostly_correct_count": mostly_correct_count,
                 "partially_correct_count": partially_correct_count,
                 "incorrect_count": incorrect_count,
-                "fully_correct_percentage": self._calculate_percentage_in_total_tests(fully_correct_count, total_runs),
-                "mostly_correct_percentage": self._calculate_percentage_in_total_tests(mostly_correct_count, total_runs),
-                "partially_correct_percentage": self._calculate_percentage_in_total_tests(partially_correct_count, total_runs),
-                "incorrect_percentage": self._calculate_percentage_in_total_tests(incorrect_count, total_runs),
-                "success_rate": self._calculate_percentage_in_total_tests(success_count, total_runs),
+                "failed_count": failed_count,
+                "answered_runs": answered_runs,
+                "fully_correct_percentage": self._calculate_percentage_in_total_tests(fully_correct_count, answered_runs),
+                "mostly_correct_percentage": self._calculate_percentage_in_total_tests(mostly_correct_count, answered_runs),
+                "partially_correct_percentage": self._calculate_percentage_in_total_tests(partially_correct_count, answered_runs),
+                "incorrect_percentage": self._calculate_percentage_in_total_tests(incorrect_count, answered_runs),
+                "success_rate": self._calculate_percentage_in_total_tests(success_count, answered_runs),
                 "stability_score": stability_score,
                 "dominant_category": dominant_category,
                 "is_stable": stability_score >= 0.8,
-                "is_problematic": incorrect_count > (total_runs * 0.80)
+                "is_problematic": answered_runs > 0 and incorrect_count > (answered_runs * 0.80)
             }
 
         # Add summary section
@@ -279,6 +346,18 @@ class TestRunner:
             total_tests = len(self.tests_results)
         return (count / total_tests * 100) if total_tests > 0 else 0
 
+    @staticmethod
+    def _statistics_since(current, baseline):
+        difference = {}
+        for key, value in current.items():
+            if isinstance(value, dict):
+                difference[key] = TestRunner._statistics_since(value, baseline.get(key, {}))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                difference[key] = value - baseline.get(key, 0)
+            else:
+                difference[key] = value
+        return difference
+
     @staticmethod
     def _separate_question(details):
         question = details.get("question", "")
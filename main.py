@@ -11,6 +11,9 @@ if __name__ == "__main__":
     # rag.clear_vectorstore()
     # rag.load_text_files()
     # rag.load_pdf_files(use_semantic=True)
+    # rag.import_snapshot("snapshots/rag_collection.npz")
+
+    session = rag.start_session()
 
     log.answer(f"Hello! How can I assist you today?")
     while True:
@@ -18,9 +21,17 @@ if __name__ == "__main__":
         if user_input.lower() in {"exit", "quit"}:
             log.answer("Goodbye!")
             break
+        if user_input.lower() in {"reset", "new"}:
+            session.clear_history()
+            log.answer("Conversation history cleared.")
+            continue
 
         start_time = time.time()
-        answer, _, _ = rag.ask(user_input)
+        try:
+            answer, _, _ = rag.ask(user_input, session=session)
+        except Exception as error:
+            log.error(f"Failed to answer the question: {error}")
+            continue
         end_time = time.time()
         elapsed_time = end_time - start_time
         log.statistics(f"Execution time: {elapsed_time:.2f} seconds")
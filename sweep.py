@@ -0,0 +1,28 @@
+from colorama import init
+
+from utils.CustomLogger import LoggerCategory, CustomLogger
+from core.ChunkingSweep import ChunkingSweep
+from utils.utils import load_test_set
+
+CONFIGURATIONS = [
+    {"name": "recursive_1000_200", "split_chunk_size": 1000, "split_chunk_overlap": 200},
+    {"name": "recursive_500_100", "split_chunk_size": 500, "split_chunk_overlap": 100},
+    {"name": "recursive_1500_300", "split_chunk_size": 1500, "split_chunk_overlap": 300},
+    {"name": "semantic_0.9_900", "use_semantic": True,
+     "semantic_breakpoint_threshold_amount": 0.9, "semantic_min_chunk_size": 900},
+    {"name": "semantic_0.95_500", "use_semantic": True,
+     "semantic_breakpoint_threshold_amount": 0.95, "semantic_min_chunk_size": 500},
+]
+
+SOURCES = [
+    {"path": "documents/rfc", "file_type": "pdf"},
+]
+
+if __name__ == "__main__":
+    CustomLogger.configure([LoggerCategory.ERROR, LoggerCategory.LOADING])
+    init(autoreset=True)
+    file_name = "questions_rfc6265"
+    question_sets = {file_name: load_test_set(f"tests/questions/{file_name}.json")}
+
+    sweep = ChunkingSweep(CONFIGURATIONS)
+    sweep.run(SOURCES, question_sets)
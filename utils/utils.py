@@ -2,6 +2,8 @@ import datetime
 import json
 from pathlib import Path
 
+import numpy as np
+
 
 def load_files(path, extension):
     documents_dir = Path(path)
@@ -18,4 +20,47 @@ def save_json(data, file_path):
         json.dump(data, f, indent=4, ensure_ascii=False)
 
 def get_current_datetime():
-    return datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
\ No newline at end of file
+    return datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+def save_snapshot(file_path, vectors, texts, metadatas, manifest):
+    file_path = snapshot_path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    text_data, text_offsets = _encode_strings(texts)
+    metadata_data, metadata_offsets = _encode_strings(json.dumps(metadata, ensure_ascii=False) for metadata in metadatas)
+    manifest_data, _ = _encode_strings([json.dumps(manifest, ensure_ascii=False)])
+
+    # Stored uncompressed; np.load reads each array fully into memory, one array at a time when it is accessed
+    np.savez(
+        file_path,
+        vectors=np.asarray(vectors, dtype=np.float32),
+        text_data=text_data,
+        text_offsets=text_offsets,
+        metadata_data=metadata_data,
+        metadata_offsets=metadata_offsets,
+        manifest=manifest_data
+    )
+
+def load_snapshot(file_path):
+    with np.load(snapshot_path(file_path), allow_pickle=False) as snapshot:
+        manifest = json.loads(snapshot["manifest"].tobytes().decode("utf-8"))
+        vectors = snapshot["vectors"]
+        texts = _decode_strings(snapshot["text_data"], snapshot["text_offsets"])
+        metadatas = [json.loads(metadata) for metadata in
+                     _decode_strings(snapshot["metadata_data"], snapshot["metadata_offsets"])]
+
+    return manifest, vectors, texts, metadatas
+
+def snapshot_path(file_path):
+    # np.savez appends the suffix on its own, normalise up front so export and import use the same file
+    file_path = Path(file_path)
+    return file_path if file_path.suffix == ".npz" else file_path.with_name(f"{file_path.name}.npz")
+
+def _encode_strings(strings):
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _decode_strings(data, offsets):
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]